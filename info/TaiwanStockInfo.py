@@ -1,20 +1,81 @@
+import logging
 import os
 import sys
-import pandas as pd
-from typing import List, Dict
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
 
 # Add the project root directory to sys.path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
 from utils.requestUtils import request_get
-from utils.csvUtils import save_to_csv
+from utils.asyncRequestUtils import fetch_many_sync
+from utils.csvUtils import COMPRESSION_BY_EXTENSION, save_to_csv, save_to_parquet, stream_records_to_csv
 from utils.commandLineInterface import CommandLineInterface
 
+logger = logging.getLogger(__name__)
+
+# FinMind TaiwanStockPrice columns; plain Python types so it maps directly onto Arrow and pandas types
+TAIWAN_STOCK_PRICE_SCHEMA = {
+    "date": str,
+    "stock_id": str,
+    "Trading_Volume": int,
+    "Trading_money": int,
+    "open": float,
+    "max": float,
+    "min": float,
+    "close": float,
+    "spread": float,
+    "Trading_turnover": int,
+}
+
+# pandas dtypes for the same columns, applied up front instead of inferring them per column
+TAIWAN_STOCK_PRICE_DTYPES = {
+    "stock_id": str,
+    "Trading_Volume": "int64",
+    "Trading_money": "int64",
+    "open": "float64",
+    "max": "float64",
+    "min": "float64",
+    "close": "float64",
+    "spread": "float64",
+    "Trading_turnover": "int64",
+}
+TAIWAN_STOCK_PRICE_PARSE_DATES = ["date"]
+
+
+def to_dataframe(stock_deal_info: Optional[List[Dict]]):
+    """將股價日成交資訊轉成欄位型別固定的 pandas DataFrame
+    :param stock_deal_info: get_stock_deal_info 的回應資料
+    :return data: DataFrame
+    """
+    import pandas as pd
+
+    data = pd.DataFrame.from_records(stock_deal_info or [], columns=list(TAIWAN_STOCK_PRICE_SCHEMA))
+    data = data.astype(TAIWAN_STOCK_PRICE_DTYPES)
+    for column in TAIWAN_STOCK_PRICE_PARSE_DATES:
+        data[column] = pd.to_datetime(data[column], format="%Y-%m-%d")
+    return data
+
+class _FetchError(Exception):
+    """Raised inside _fetch so failed requests are not memoised by lru_cache."""
+
+
+@lru_cache(maxsize=1024)
+def _fetch(base_url: str, parameter: Tuple[Tuple[str, str], ...], use_cache: bool = True,
+           backend: str = "requests") -> Tuple[Dict, ...]:
+    data = request_get(base_url, dict(parameter), use_cache=use_cache, backend=backend)
+    if data is None:
+        raise _FetchError(parameter)
+    return tuple(data)
+
 class TaiwanStockInfo:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True, backend: str = "requests"):
         self.base_url = 'https://api.finmindtrade.com/api/v4/data'
+        self.use_cache = use_cache
+        self.backend = backend
 
     def get_stock_deal_info(self, stock_id, start_date, end_date=None) -> List[Dict]:
         """股價日成交資訊 (https://www.twse.com.tw/zh/page/trading/exchange/STOCK_DAY.html)
@@ -23,29 +84,157 @@ class TaiwanStockInfo:
         :param end_date: 截止日期，不加則抓到前一個交易日
         :return data: 回應資料
         """
-        if end_date is None:
-            end_date = datetime.now().strftime("%Y-%m-%d")
+        dates = self._resolve_dates(start_date, end_date)
+        if dates is None:
+            return []
+
+        parameter = tuple(self._build_parameter(stock_id, *dates).items())
+        # --no-cache bypasses the in-process memo as well as the on-disk cache; ranges ending today
+        # skip the memo too, it has no expiry and would outlive the file cache's short TTL
+        memoise = self.use_cache and dates[1] < date.today().strftime("%Y-%m-%d")
+        fetch = _fetch if memoise else _fetch.__wrapped__
+        try:
+            # Copy the records so callers cannot mutate the memoised ones
+            return [dict(record) for record in fetch(self.base_url, parameter, use_cache=self.use_cache, backend=self.backend)]
+        except _FetchError:
+            return None
+
+    @classmethod
+    def clear_cache(cls):
+        """清除行程內的 get_stock_deal_info 快取"""
+        _fetch.cache_clear()
+
+    def get_latest(self, stock_id, store=None) -> Optional[Dict]:
+        """最新一筆股價日成交資訊，先從 PriceDaemon 的 store 讀取，沒有才發送請求
+        :param stock_id: 股票代碼
+        :param store: PriceDaemon.store
+        :return data: 最新一筆資料
+        """
+        if store is not None and stock_id in store:
+            return store[stock_id]
+        start_date = (date.today() - timedelta(days=7)).strftime("%Y-%m-%d")
+        data = self.get_stock_deal_info(stock_id, start_date)
+        return data[-1] if data else None
+
+    def get_stock_table(self, stock_id, start_date, end_date=None):
+        """股價日成交資訊 (pyarrow.Table)，歷史資料保存在本機 Arrow IPC 檔案 (需要 pyarrow)
+        已保存的區間只抓取最後一筆之後的新資料，讀取時以 mmap 取用不需複製
+        :param stock_id: 股票代碼
+        :param start_date: 開始日期
+        :param end_date: 截止日期，不加則抓到前一個交易日
+        :return table: 回應資料
+        """
+        import pyarrow.compute as pc
+        from utils import featherCache
+
+        table = featherCache.load(stock_id)
+        covered = featherCache.covered_start(table) if table is not None and table.num_rows else None
+        if covered is not None and covered <= start_date:
+            last_date = datetime.strptime(pc.max(table["date"]).as_py(), "%Y-%m-%d").date()
+            next_date = (last_date + timedelta(days=1)).strftime("%Y-%m-%d")
+            new_rows = self.get_stock_deal_info(stock_id, next_date)
+            if new_rows:
+                table = featherCache.merge(stock_id, featherCache.from_records(new_rows, TAIWAN_STOCK_PRICE_SCHEMA))
+        else:
+            # Cached files always run up to the latest trading day so later calls only append
+            rows = self.get_stock_deal_info(stock_id, start_date) or []
+            table = featherCache.from_records(rows, TAIWAN_STOCK_PRICE_SCHEMA)
+            if rows:
+                featherCache.store(stock_id, table, start_date=start_date)
+
+        end_date = end_date or date.today().strftime("%Y-%m-%d")
+        return table.filter(pc.and_(pc.greater_equal(table["date"], start_date), pc.less_equal(table["date"], end_date)))
+
+    def get_stock_deal_info_many(self, stock_ids, start_date, end_date=None, limit=8) -> Dict[str, List[Dict]]:
+        """同時抓取多檔股票的股價日成交資訊 (需要 httpx)
+        一律使用 httpx.AsyncClient，不受 backend 設定影響；也不經過 get_stock_deal_info 的行程內快取，只使用磁碟快取
+        :param stock_ids: 股票代碼列表
+        :param start_date: 開始日期
+        :param end_date: 截止日期，不加則抓到前一個交易日
+        :param limit: 同時進行的請求數量上限
+        :return data: 以股票代碼為 key 的回應資料
+        """
+        dates = self._resolve_dates(start_date, end_date)
+        if dates is None:
+            return {stock_id: [] for stock_id in stock_ids}
+
+        parameters = [self._build_parameter(stock_id, *dates) for stock_id in stock_ids]
+        results = fetch_many_sync(self.base_url, parameters, limit=limit, use_cache=self.use_cache)
+        return dict(zip(stock_ids, results))
+
+    def get_many_threaded(self, stock_ids, start_date, end_date=None, workers=10) -> Dict[str, List[Dict]]:
+        """以執行緒池同時抓取多檔股票的股價日成交資訊 (不需要 httpx)
+        抓取資料是 I/O-bound，執行緒在等待網路時會釋放 GIL；
+        改用 ProcessPoolExecutor 反而更慢，每個行程都要重新 import 並以 pickle 傳回結果。
+        :param stock_ids: 股票代碼列表
+        :param start_date: 開始日期
+        :param end_date: 截止日期，不加則抓到前一個交易日
+        :param workers: 執行緒數量
+        :return data: 以股票代碼為 key 的回應資料
+        """
+        def fetch(stock_id):
+            # executor.map re-raises the first worker exception, which would drop every other result
+            try:
+                return self.get_stock_deal_info(stock_id, start_date, end_date)
+            except Exception as e:
+                logger.error("Request failed: %s (%s)", e, stock_id)
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(stock_ids, executor.map(fetch, stock_ids)))
+
+    @staticmethod
+    def _resolve_dates(start_date, end_date=None) -> Optional[Tuple[str, str]]:
+        """檢查日期區間，不可能有資料時回傳 None 以省下一次網路請求
+        截止日期會被限制在今天，讓快取的 key 在重複執行時保持一致
+        :param start_date: 開始日期 (YYYY-MM-DD)
+        :param end_date: 截止日期 (YYYY-MM-DD)，不加則為今天
+        :return: (開始日期, 截止日期)
+        """
+        today = date.today()
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else today
+        end = min(end, today)
+        if start > today or end < start:
+            return None
+        # A range of only Saturday/Sunday has no trading days
+        if (end - start).days < 2 and all((start + timedelta(days=d)).weekday() >= 5 for d in range((end - start).days + 1)):
+            return None
+        return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
 
-        parameter = {
+    @staticmethod
+    def _build_parameter(stock_id, start_date, end_date) -> Dict:
+        return {
             "dataset": "TaiwanStockPrice",
             "data_id": stock_id,
             "start_date": start_date,
             "end_date": end_date,
         }
-        data = request_get(self.base_url, parameter)
-        return data
 
 def main():
     # Use the CommandLineInterface class for argument parsing
     cli = CommandLineInterface()
     args = cli.parse_arguments()
 
-    stock_finmind = TaiwanStockInfo()
-    stock_deal_info = stock_finmind.get_stock_deal_info(args.stock_id, args.start_date, args.end_date)
-    data = pd.DataFrame(stock_deal_info)
+    stock_finmind = TaiwanStockInfo(use_cache=not args.no_cache, backend=args.backend)
+    stock_ids = args.stock_ids
+    if len(stock_ids) > 1:
+        try:
+            results = stock_finmind.get_stock_deal_info_many(stock_ids, args.start_date, args.end_date, limit=args.workers)
+        except ImportError:
+            results = stock_finmind.get_many_threaded(stock_ids, args.start_date, args.end_date, workers=args.workers)
+        stock_deal_info = [row for rows in results.values() if rows for row in rows]
+    else:
+        stock_deal_info = stock_finmind.get_stock_deal_info(stock_ids[0], args.start_date, args.end_date)
 
-    # Save the dataFrame to a CSV file
-    save_to_csv(data, args.output)
+    # Save the records in the format implied by the output extension
+    extension = os.path.splitext(args.output)[1].lower()
+    if extension == ".parquet":
+        save_to_parquet(to_dataframe(stock_deal_info), args.output)
+    elif extension in COMPRESSION_BY_EXTENSION:
+        save_to_csv(to_dataframe(stock_deal_info), args.output, compression=COMPRESSION_BY_EXTENSION[extension])
+    else:
+        stream_records_to_csv(stock_deal_info, args.output, list(TAIWAN_STOCK_PRICE_SCHEMA), append=args.append)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
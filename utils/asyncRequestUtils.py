@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, only the batch path needs it
+    httpx = None
+
+from utils.requestUtils import HTTP2_AVAILABLE, _cache_lookup, _cache_store, conditional_headers
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch(client: "httpx.AsyncClient", semaphore: asyncio.Semaphore, base_url: str,
+                params: Dict[str, Any], use_cache: bool = True) -> Optional[List[Dict[str, Any]]]:
+    """Fetch one request, holding the semaphore only while the request is in flight.
+
+    :param client: shared async client
+    :param semaphore: limits the number of concurrent requests
+    :param base_url: API endpoint
+    :param params: query parameters
+    :param use_cache: read from and write to the on-disk response cache
+    :return data: response data, None on error
+    """
+    cached, stale = _cache_lookup(base_url, params, use_cache)
+    if cached is not None:
+        return cached
+
+    try:
+        async with semaphore:
+            r = await client.get(base_url, params=params, headers=conditional_headers(stale))
+    except httpx.HTTPError as e:
+        # Fail this ticker only; an exception here would abort the whole gather
+        logger.error("Request failed: %s (%s)", e, params.get('data_id'))
+        return None
+    return _cache_store(base_url, params, r, stale, use_cache)
+
+
+async def fetch_many(base_url: str, param_list: List[Dict[str, Any]], limit: int = 8,
+                     use_cache: bool = True) -> List[Optional[List[Dict[str, Any]]]]:
+    """Fetch every request in ``param_list`` concurrently over one client.
+
+    :param base_url: API endpoint
+    :param param_list: query parameters, one dict per request
+    :param limit: maximum number of requests in flight
+    :param use_cache: read from and write to the on-disk response cache
+    :return: response data in the same order as ``param_list``
+    """
+    if httpx is None:
+        raise ImportError("httpx is required for concurrent fetches (pip install httpx)")
+
+    semaphore = asyncio.Semaphore(limit)
+    async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=30) as client:
+        return await asyncio.gather(
+            *[fetch(client, semaphore, base_url, params, use_cache) for params in param_list]
+        )
+
+
+def fetch_many_sync(base_url: str, param_list: List[Dict[str, Any]], limit: int = 8,
+                    use_cache: bool = True) -> List[Optional[List[Dict[str, Any]]]]:
+    """Blocking wrapper around :func:`fetch_many` for non-async callers."""
+    return asyncio.run(fetch_many(base_url, param_list, limit, use_cache))
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(base_url: str, params: Dict[str, Any]) -> str:
+    """Build a stable cache key from the request URL and its parameters.
+
+    :param base_url: API endpoint
+    :param params: query parameters
+    :return: md5 hex digest of the request
+    """
+    raw = f"{base_url}|{json.dumps(params, sort_keys=True)}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class FileCache:
+    """JSON file cache with a per-entry TTL, stored under ``root/<namespace...>/<key>.json``."""
+
+    def __init__(self, root: str = ".cache"):
+        self.root = root
+
+    def _path(self, key: str, namespace: tuple = ()) -> str:
+        return os.path.join(self.root, *namespace, f"{key}.json")
+
+    def _read(self, key: str, namespace: tuple = ()) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key, namespace), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, entry: Dict[str, Any], namespace: tuple = ()) -> None:
+        path = self._path(key, namespace)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a unique temp file first so a crashed run never leaves a half-written entry
+        # and concurrent writers of the same key never share a temp file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str, namespace: tuple = ()) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired.
+
+        :param key: cache key
+        :param namespace: sub-directories the entry is stored under
+        :return: cached value
+        """
+        entry = self._read(key, namespace)
+        if entry is None or time.time() - entry["ts"] > entry["ttl"]:
+            return None
+        return entry["data"]
+
+    def get_entry(self, key: str, namespace: tuple = ()) -> Optional[Dict[str, Any]]:
+        """Return the raw entry even if it has expired, so its validators can be reused.
+
+        :param key: cache key
+        :param namespace: sub-directories the entry is stored under
+        :return: entry with ``data``, ``etag`` and ``last_modified``
+        """
+        return self._read(key, namespace)
+
+    def set(self, key: str, value: Any, ttl: float, namespace: tuple = (),
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store a value for ``ttl`` seconds.
+
+        :param key: cache key
+        :param value: JSON serialisable value
+        :param ttl: time to live in seconds
+        :param namespace: sub-directories the entry is stored under
+        :param etag: ETag response header, sent back as If-None-Match
+        :param last_modified: Last-Modified response header, sent back as If-Modified-Since
+        """
+        entry = {"ts": time.time(), "ttl": ttl, "data": value, "etag": etag, "last_modified": last_modified}
+        self._write(key, entry, namespace)
+
+    def touch(self, key: str, ttl: float, namespace: tuple = ()) -> None:
+        """Restart the TTL of an existing entry, e.g. after a 304 Not Modified.
+
+        :param key: cache key
+        :param ttl: time to live in seconds
+        :param namespace: sub-directories the entry is stored under
+        """
+        entry = self._read(key, namespace)
+        if entry is None:
+            return
+        entry["ts"] = time.time()
+        entry["ttl"] = ttl
+        self._write(key, entry, namespace)
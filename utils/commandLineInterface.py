@@ -1,14 +1,45 @@
 import argparse
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from utils.csvUtils import COMPRESSION_BY_EXTENSION
+
+
+def _date_argument(value: str) -> str:
+    """argparse type for YYYY-MM-DD dates; a bad value becomes a usage error, not a traceback."""
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+    return value
 
 
 class CommandLineInterface:
     """Handles command line argument parsing for the stock data application."""
     
-    def parse_arguments(self) -> argparse.Namespace:
-        """Parse command line arguments and return the parsed namespace."""
-        parser = argparse.ArgumentParser(description="Fetch Taiwan Stock Deal Info")
-        parser.add_argument("stock_id", type=str, help="Stock ID (e.g 0050)")
-        parser.add_argument("start_date", type=str, help="Start date (e.g 2021-09-13)")
-        parser.add_argument("end_date", type=str, nargs="?", default=None, help="End date (YYYY-MM-DD, optional)")
-        parser.add_argument("--output", type=str, default="stock_data.csv", help="Output CSV file name")
-        return parser.parse_args()
\ No newline at end of file
+    def __init__(self):
+        # Build the parser once so repeated parse_arguments calls skip the argparse setup
+        self._parser = argparse.ArgumentParser(description="Fetch Taiwan Stock Deal Info")
+        self._parser.add_argument("stock_id", type=str, help="Stock ID, or comma-separated IDs (e.g 0050 or 0050,2330)")
+        self._parser.add_argument("start_date", type=_date_argument, help="Start date (e.g 2021-09-13)")
+        self._parser.add_argument("end_date", type=_date_argument, nargs="?", default=None, help="End date (YYYY-MM-DD, optional)")
+        self._parser.add_argument("--output", type=str, default="stock_data.csv", help="Output file name; .parquet writes Parquet, .gz/.bz2/.xz/.zip compressed CSV, anything else CSV")
+        self._parser.add_argument("--append", action="store_true", help="Append only new rows to an existing plain CSV file")
+        self._parser.add_argument("--workers", type=int, default=10, help="Concurrent requests when fetching several stock IDs")
+        self._parser.add_argument("--backend", choices=["requests", "httpx"], default="requests", help="HTTP client for single-stock requests; several stock IDs are fetched with httpx.AsyncClient when httpx is installed")
+        self._parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+
+    def parse_arguments(self, argv: Optional[List[str]] = None) -> argparse.Namespace:
+        """Parse command line arguments and return the parsed namespace.
+
+        :param argv: Arguments to parse, defaults to sys.argv[1:]
+        """
+        args = self._parser.parse_args(argv)
+        args.stock_ids = [stock_id.strip() for stock_id in args.stock_id.split(",") if stock_id.strip()]
+        if not args.stock_ids:
+            self._parser.error("stock_id must contain at least one stock ID")
+        extension = os.path.splitext(args.output)[1].lower()
+        if args.append and (extension == ".parquet" or extension in COMPRESSION_BY_EXTENSION):
+            self._parser.error("--append only works with plain CSV output")
+        return args
@@ -1,10 +1,136 @@
-import pandas as pd
+import csv
+import os
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
-def save_to_csv(data: pd.DataFrame, fileName: str):
+# pandas and pyarrow take hundreds of ms to import, so they are only loaded by the writers
+# that need them; the CLI's plain CSV path never imports them at all
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Output extensions written compressed through save_to_csv
+COMPRESSION_BY_EXTENSION = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zip": "zip"}
+# Codecs pyarrow can stream CSV through; the others go through DataFrame.to_csv
+_ARROW_COMPRESSIONS = {"gzip", "bz2"}
+
+def _last_csv_date(fileName: str, column: str = "date") -> Optional[str]:
+    """Read the ``column`` value of the last row by seeking to the end of the file.
+
+    :param fileName: Name of an existing CSV file
+    :param column: Date column name
+    :return: Last date, None if the file has no rows or no such column
+    """
+    with open(fileName, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]), [])
+        if column not in header:
+            return None
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - 4096, 0))
+        # Trailing blank lines would otherwise hide the last row and re-append everything
+        lines = [line for line in f.read().decode("utf-8", errors="ignore").splitlines() if line.strip()]
+    last_row = next(csv.reader([lines[-1]]), []) if lines else []
+    if not last_row or last_row == header:
+        return None
+    return last_row[header.index(column)]
+
+def _prepare_append(fileName: str, append: bool) -> Tuple[bool, Optional[str]]:
+    """Decide whether a write appends to ``fileName`` and from which date.
+
+    A missing file is written from scratch with a header. When appending, the file is made
+    to end with a newline so the first new row does not run into the last existing one.
+
+    :param fileName: Name of the output CSV file
+    :param append: Whether the caller asked to append
+    :return: (appending, last_date); only rows dated after ``last_date`` should be written
+    """
+    if not (append and os.path.exists(fileName)):
+        return False, None
+    with open(fileName, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return True, _last_csv_date(fileName)
+
+def _newer_records(records: Iterable[Dict[str, Any]], last_date: Optional[str]) -> Iterable[Dict[str, Any]]:
+    """Keep the records dated after ``last_date``; FinMind dates are ISO strings, so string order is date order."""
+    if last_date is None:
+        return records
+    return (record for record in records if record["date"] > last_date)
+
+def save_to_csv(data: "pd.DataFrame", fileName: str, compression: Optional[str] = None, append: bool = False):
     """Save DataFrame to a CSV file.
 
+    Uses pyarrow's multithreaded CSV writer when it is installed (strings are quoted and whole
+    floats lose their ".0", the values read back the same); otherwise DataFrame.to_csv.
+
     :param data: DataFrame to be saved
     :param fileName: Name of the output CSV file
+    :param compression: Compression codec for the output (e.g. "gzip"), None for plain text
+    :param append: Append only rows dated after the last row of an existing file
+    """
+    import pandas as pd
+
+    if append and compression:
+        raise ValueError("append is not supported for compressed output")
+    appending, last_date = _prepare_append(fileName, append)
+    if last_date is not None:
+        data = data[pd.to_datetime(data["date"]) > pd.Timestamp(last_date)]
+
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pacsv
+    except ImportError:  # pyarrow is optional, fall back to DataFrame.to_csv
+        pa = None
+    if pa is None or (compression and compression not in _ARROW_COMPRESSIONS):
+        data.to_csv(fileName, index=False, compression=compression, chunksize=50_000,
+                    mode="a" if appending else "w", header=not appending)
+    else:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        # Write date-only timestamps as YYYY-MM-DD, as to_csv does, not with a 00:00:00 time
+        for i, field in enumerate(table.schema):
+            column = table.column(i)
+            if pa.types.is_timestamp(field.type):
+                date_only = pc.all(pc.equal(column, pc.floor_temporal(column, unit="day"))).as_py()
+                if date_only is not False:
+                    table = table.set_column(i, field.name, column.cast(pa.date32()))
+        write_options = pacsv.WriteOptions(include_header=not appending)
+        if compression:
+            with pa.CompressedOutputStream(fileName, compression) as stream:
+                pacsv.write_csv(table, stream, write_options=write_options)
+        else:
+            with open(fileName, "ab" if appending else "wb") as f:
+                pacsv.write_csv(table, f, write_options=write_options)
+    print(f"Data {'appended' if appending else 'saved'} to {fileName}")
+
+def stream_records_to_csv(records: Iterable[Dict[str, Any]], fileName: str, header: List[str],
+                          append: bool = False):
+    """Write records to a CSV file as they arrive, without building a DataFrame.
+
+    Works with generators, so rows never have to be held in memory all at once.
+
+    :param records: Records to be saved
+    :param fileName: Name of the output CSV file
+    :param header: Column names, keys not listed are ignored
+    :param append: Append only records dated after the last row of an existing file
+    """
+    appending, last_date = _prepare_append(fileName, append)
+    records = _newer_records(records or [], last_date)
+
+    with open(fileName, "a" if appending else "w", buffering=1 << 20, newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=header, extrasaction="ignore", lineterminator="\n")
+        if not appending:
+            writer.writeheader()
+        writer.writerows(records)
+    print(f"Data {'appended' if appending else 'saved'} to {fileName}")
+
+def save_to_parquet(data: "pd.DataFrame", fileName: str):
+    """Save DataFrame to a Snappy-compressed Parquet file (requires pyarrow).
+
+    :param data: DataFrame to be saved
+    :param fileName: Name of the output Parquet file
     """
-    data.to_csv(fileName, index=False)
+    data.to_parquet(fileName, compression="snappy", engine="pyarrow", index=False)
     print(f"Data saved to {fileName}")
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+CACHE_DIR = os.path.join(".cache", "feather")
+
+# Schema metadata key holding the first requested date the file covers; the first stored row
+# can be later (weekends, holidays), so it cannot tell whether an earlier start is cached
+_START_DATE_KEY = b"start_date"
+
+# Python types used by the record schemas mapped to their Arrow types
+_ARROW_TYPES = {str: pa.string(), int: pa.int64(), float: pa.float64()}
+
+
+def _path(ticker: str) -> str:
+    return os.path.join(CACHE_DIR, f"{ticker}.arrow")
+
+
+def from_records(records: List[Dict[str, Any]], schema: Dict[str, type]) -> pa.Table:
+    """Build an Arrow table from API records using a column name to Python type mapping.
+
+    :param records: Records to convert
+    :param schema: Column name to type mapping, columns not listed are dropped
+    :return: Arrow table
+    """
+    arrow_schema = pa.schema([(name, _ARROW_TYPES[tp]) for name, tp in schema.items()])
+    return pa.Table.from_pylist(records, schema=arrow_schema)
+
+
+def load(ticker: str) -> Optional[pa.Table]:
+    """Memory-map the cached table for a ticker; columns are read zero-copy from the page cache.
+
+    :param ticker: Stock ID
+    :return: Arrow table, None if nothing is cached
+    """
+    path = _path(ticker)
+    if not os.path.exists(path):
+        return None
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def covered_start(table: pa.Table) -> Optional[str]:
+    """Return the first date a cached table covers, None if it was stored without one.
+
+    :param table: Table returned by :func:`load`
+    :return: Start date (YYYY-MM-DD)
+    """
+    value = (table.schema.metadata or {}).get(_START_DATE_KEY)
+    return value.decode() if value is not None else None
+
+
+def store(ticker: str, table: pa.Table, start_date: Optional[str] = None) -> None:
+    """Write a ticker's table as an Arrow IPC (Feather v2) file, replacing it atomically.
+
+    :param ticker: Stock ID
+    :param table: Arrow table to store
+    :param start_date: First date the table covers, kept in the schema metadata
+    """
+    if start_date is not None:
+        metadata = dict(table.schema.metadata or {})
+        metadata[_START_DATE_KEY] = start_date.encode()
+        table = table.replace_schema_metadata(metadata)
+    path = _path(ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A unique temp file keeps concurrent writers of the same ticker from clobbering each other
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def merge(ticker: str, table: pa.Table) -> pa.Table:
+    """Append the rows of ``table`` newer than the cached data and store the result.
+
+    :param ticker: Stock ID
+    :param table: Freshly fetched rows, with the same schema as the cached table
+    :return: The merged table, keeping the cached table's coverage metadata
+    """
+    existing = load(ticker)
+    if existing is None or existing.num_rows == 0:
+        merged = table
+    else:
+        last_date = pc.max(existing["date"])
+        new_rows = table.filter(pc.greater(table["date"], last_date))
+        merged = pa.concat_tables([existing, new_rows.cast(existing.schema)])
+    store(ticker, merged)
+    return merged
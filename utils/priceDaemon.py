@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, MutableMapping, Optional
+
+from utils.requestUtils import PreparedFetch
+
+logger = logging.getLogger(__name__)
+
+
+class PriceDaemon:
+    """Polls FinMind in a background thread and publishes the latest record of each watched stock.
+
+    Readers look up ``store[stock_id]`` instead of issuing their own requests. ``store`` defaults
+    to a plain dict; pass a ``multiprocessing.Manager().dict()`` to share it across processes.
+    """
+
+    def __init__(self, base_url: str, interval: float = 60.0, store: Optional[MutableMapping[str, Any]] = None,
+                 dataset: str = "TaiwanStockPrice", lookback_days: int = 7):
+        self.base_url = base_url
+        self.interval = interval
+        self.store = store if store is not None else {}
+        self.dataset = dataset
+        self.lookback_days = lookback_days
+        self._intervals: Dict[str, float] = {}
+        self._next_poll: Dict[str, float] = {}
+        self._fetchers: Dict[str, PreparedFetch] = {}
+        # Notified on watch/stop so the polling thread wakes up without waiting out its sleep
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, stock_id: str, interval: Optional[float] = None) -> None:
+        """Start polling a stock, optionally with its own interval in seconds."""
+        with self._cond:
+            self._intervals[stock_id] = interval or self.interval
+            self._next_poll[stock_id] = 0.0
+            self._cond.notify()
+
+    def unwatch(self, stock_id: str) -> None:
+        """Stop polling a stock; its last published record stays in the store."""
+        with self._cond:
+            self._intervals.pop(stock_id, None)
+            self._next_poll.pop(stock_id, None)
+            self._fetchers.pop(stock_id, None)
+
+    def start(self) -> None:
+        """Start the polling thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="PriceDaemon", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal the polling thread to exit and wait for it."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _params(self, stock_id: str) -> Dict[str, str]:
+        today = date.today()
+        return {
+            "dataset": self.dataset,
+            "data_id": stock_id,
+            "start_date": (today - timedelta(days=self.lookback_days)).strftime("%Y-%m-%d"),
+            "end_date": today.strftime("%Y-%m-%d"),
+        }
+
+    def _poll(self, stock_id: str) -> None:
+        # Prepared requests bypass the file cache, whose entries would hide a fresh quote for up to its TTL;
+        # they are only rebuilt when the date window moves
+        params = self._params(stock_id)
+        fetcher = self._fetchers.get(stock_id)
+        if fetcher is None:
+            fetcher = self._fetchers[stock_id] = PreparedFetch(self.base_url, params)
+        else:
+            fetcher.update(params)
+        data = fetcher.send()
+        if data:
+            self.store[stock_id] = data[-1]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._cond:
+                due = [stock_id for stock_id, at in self._next_poll.items() if at <= now]
+            for stock_id in due:
+                try:
+                    self._poll(stock_id)
+                except Exception as e:
+                    logger.error("Polling %s failed: %s", stock_id, e)
+                with self._cond:
+                    if stock_id in self._intervals:
+                        self._next_poll[stock_id] = time.monotonic() + self._intervals[stock_id]
+            with self._cond:
+                wait = min(self._next_poll.values(), default=now + self.interval) - time.monotonic()
+                if wait > 0 and not self._stop.is_set():
+                    self._cond.wait(wait)
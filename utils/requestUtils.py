@@ -1,23 +1,221 @@
+import importlib.util
+import json
+import logging
+import os
+import threading
 import time
-from typing import Dict, List, Any, Optional
+from datetime import date
+from typing import Dict, List, Any, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def request_get(base_url: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
-    r = requests.get(base_url, params=params, timeout=30)
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib decoder
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, only the "httpx" backend needs it
+    httpx = None
+
+# Connection, timeout and DNS failures from either backend
+_TRANSPORT_ERRORS = (requests.RequestException,) + ((httpx.HTTPError,) if httpx is not None else ())
+
+# HTTP/2 support in httpx needs the h2 package (pip install 'httpx[http2]')
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+from utils.cache import FileCache, make_cache_key
+
+# Historical ranges never change, so they can be cached for a day by default
+CACHE_TTL = float(os.environ.get("FINMIND_CACHE_TTL", 24 * 60 * 60))
+# Ranges that still include today keep receiving new bars
+OPEN_INTERVAL_TTL = 5 * 60
+
+logger = logging.getLogger(__name__)
+
+_CACHE = FileCache()
+
+
+def loads_json(content: bytes) -> Any:
+    """Decode a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _build_session() -> requests.Session:
+    """Create the shared session so every call reuses pooled keep-alive connections."""
+    session = requests.Session()
+    # raise_on_status=False hands back the last 429/5xx response once retries run out, instead of raising RetryError
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_SESSION = _build_session()
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _get_httpx_client() -> "httpx.Client":
+    """Create the shared httpx client on first use; HTTP/2 multiplexes requests over one connection."""
+    global _CLIENT
+    if httpx is None:
+        raise ImportError("httpx is required for the httpx backend (pip install 'httpx[http2]')")
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                timeout=30,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            )
+    return _CLIENT
+
+
+def _cache_ttl(params: Dict[str, Any]) -> float:
+    end_date = params.get("end_date")
+    if end_date is None or end_date >= date.today().strftime("%Y-%m-%d"):
+        return min(CACHE_TTL, OPEN_INTERVAL_TTL)
+    return CACHE_TTL
+
+
+def _cache_namespace(params: Dict[str, Any]) -> tuple:
+    return (str(params.get("dataset", "default")), str(params.get("data_id", "default")))
+
+
+def get_cached(base_url: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Return a cached response for this request, or None on a miss."""
+    return _CACHE.get(make_cache_key(base_url, params), _cache_namespace(params))
+
+
+def get_stale_entry(base_url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the cache entry for this request even if expired, or None if there is none."""
+    return _CACHE.get_entry(make_cache_key(base_url, params), _cache_namespace(params))
+
+
+def set_cached(base_url: str, params: Dict[str, Any], data: List[Dict[str, Any]], headers=None) -> None:
+    """Cache a response for this request with a TTL based on its date range.
+
+    ETag and Last-Modified from ``headers`` are kept so the next fetch can be conditional.
+    """
+    headers = headers or {}
+    _CACHE.set(make_cache_key(base_url, params), data, _cache_ttl(params), _cache_namespace(params),
+               etag=headers.get("ETag"), last_modified=headers.get("Last-Modified"))
+
+
+def touch_cached(base_url: str, params: Dict[str, Any]) -> None:
+    """Restart the TTL of a cached response that the server reported as not modified."""
+    _CACHE.touch(make_cache_key(base_url, params), _cache_ttl(params), _cache_namespace(params))
+
+
+def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a cache entry."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def request_get(base_url: str, params: Dict[str, Any], use_cache: bool = True,
+                backend: str = "requests") -> Optional[List[Dict[str, Any]]]:
+    if backend == "requests":
+        client = _SESSION
+    elif backend == "httpx":
+        client = _get_httpx_client()
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    cached, stale = _cache_lookup(base_url, params, use_cache)
+    if cached is not None:
+        return cached
+
+    try:
+        r = client.get(base_url, params=params, headers=conditional_headers(stale), timeout=30)
+    except _TRANSPORT_ERRORS as e:
+        logger.error("Request failed: %s", e)
+        return None
+    return _cache_store(base_url, params, r, stale, use_cache)
+
+
+def _cache_lookup(base_url: str, params: Dict[str, Any],
+                  use_cache: bool) -> Tuple[Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+    """Cache step before a request, shared by the sync and async fetches.
+
+    :return: (fresh cached data or None, expired entry to revalidate or None)
+    """
+    if not use_cache:
+        return None, None
+    cached = get_cached(base_url, params)
+    if cached is not None:
+        return cached, None
+    return None, get_stale_entry(base_url, params)
+
+
+def _cache_store(base_url: str, params: Dict[str, Any], r, stale: Optional[Dict[str, Any]],
+                 use_cache: bool) -> Optional[List[Dict[str, Any]]]:
+    """Cache step after a response, shared by the sync and async fetches.
+
+    A 304 revalidates ``stale``; otherwise the records are parsed and cached.
+    :return: response data, None on error
+    """
+    if r.status_code == 304 and stale is not None:
+        touch_cached(base_url, params)
+        return stale["data"]
+    records = _parse_response(r)
+
+    # Nothing to cache yet, the range may still be published later
+    if not records:
+        return records
+    if use_cache:
+        set_cached(base_url, params, records, r.headers)
+    return records
+
+
+def _parse_response(r) -> Optional[List[Dict[str, Any]]]:
+    """Extract the records from a FinMind response, None on any error."""
     if r.status_code != requests.codes.ok:
-        print(f'Error: {r.status_code}')
+        logger.error("Request failed with status %s", r.status_code)
+        return None
     try:
-        data = r.json()
+        data = loads_json(r.content)
         if data['status'] != 200:
-            print(f"Error: {data['msg']}")
+            logger.error("API error: %s", data['msg'])
             return None
+        return data['data'] or []
     except (ValueError, KeyError, TypeError) as e:
-        logger.error(f"JSON parsing error: {e}") 
-        return None
-    except requests.exceptions.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("JSON parsing error: %s", e)
         return None
-    return data['data']
\ No newline at end of file
+
+
+class PreparedFetch:
+    """A GET request prepared once and re-sent as is, for polling the same query in a loop.
+
+    The URL encoding and header assembly happen in ``update`` only when the parameters change,
+    not on every ``send``. Responses bypass the file cache.
+    """
+
+    def __init__(self, base_url: str, params: Dict[str, Any], session: Optional[requests.Session] = None):
+        self.base_url = base_url
+        self.session = session if session is not None else _SESSION
+        self.params: Optional[Dict[str, Any]] = None
+        self.prepared: Optional[requests.PreparedRequest] = None
+        self.update(params)
+
+    def update(self, params: Dict[str, Any]) -> None:
+        """Rebuild the prepared request if the parameters changed (e.g. a new end_date)."""
+        if params == self.params:
+            return
+        self.params = dict(params)
+        self.prepared = self.session.prepare_request(requests.Request("GET", self.base_url, params=self.params))
+
+    def send(self) -> Optional[List[Dict[str, Any]]]:
+        """Send the prepared request and return its records, None on error."""
+        return _parse_response(self.session.send(self.prepared, timeout=30))